@@ -12,6 +12,7 @@ from speed_activity import _check_speed_requirement
 from total_activity import _activity_distance, _activity_duration, _activity_count
 from distance_activity import _distance_total
 from duration_activity import _check_duration
+from time_activity import _time_segments, _daily_activity, _hourly_activity
 
 pd.set_option('display.max_rows', 1000)
 pd.set_option('display.max_columns', 1000)
@@ -23,6 +24,9 @@ MONTHS = ["SEPTEMBER"]
 # MONTHS = ["JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE", "JULY", "AUGUST",
 #          "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER"]
 TEXT = " "
+# write the trips, duration and distance per day and per hour of the week to
+# output/results_daily.csv and output/results_hourly.csv
+TIME_BUCKETS = False
 
 
 def process(file_data):
@@ -40,15 +44,16 @@ def process(file_data):
     results_subway = []
     results_plane = []
     results_distance = []
+    segments = []
     filenames = []
 
     # Create Geodataframes of the public transport stations and stops
-    # and airports in EPSG 4326 and EPSG 32634.
-    train_coord_4326, train_coord_32634 = _create_coordinates('input/stations/Train stations.csv')
-    bus_coord_4326, bus_coord_32634 = _create_coordinates('input/stations/Bus stops.csv')
-    tram_coord_4326, tram_coord_32634 = _create_coordinates('input/stations/Tram stops.csv')
-    subway_coord_4326, subway_coord_32634 = _create_coordinates('input/stations/Subway stops.csv')
-    plane_coord_4326, plane_coord_32634 = _create_coordinates('input/stations/Airports.csv')
+    # and airports in EPSG 4326 and the local metric projection.
+    train_coord_4326, train_coord_utm = _create_coordinates('input/stations/Train stations.csv')
+    bus_coord_4326, bus_coord_utm = _create_coordinates('input/stations/Bus stops.csv')
+    tram_coord_4326, tram_coord_utm = _create_coordinates('input/stations/Tram stops.csv')
+    subway_coord_4326, subway_coord_utm = _create_coordinates('input/stations/Subway stops.csv')
+    plane_coord_4326, plane_coord_utm = _create_coordinates('input/stations/Airports.csv')
     # Extract info from selected years and months
     with zipfile.ZipFile(file_data) as z_file:
         file_list = z_file.namelist()
@@ -77,16 +82,16 @@ def process(file_data):
                         # Check if the start/end locations meet the requirement of being stations
                         tot_no_train_count, tot_tram_station, tot_subway_station, tram_travel, subway_travel, \
                         tot_not_train, tot_no_station_count = _train_check_location(location_history_json,
-                                                                                    train_coord_32634, tram_coord_32634,
-                                                                                    subway_coord_32634)
+                                                                                    train_coord_utm, tram_coord_utm,
+                                                                                    subway_coord_utm)
 
                         tot_no_bus_count, no_bus_count = _check_location(location_history_json,
-                                                                         bus_coord_32634, "IN_BUS")
+                                                                         bus_coord_utm, "IN_BUS")
                         tot_no_tram_count, no_tram_count = _check_location(location_history_json,
-                                                                         tram_coord_32634, "IN_TRAM")
+                                                                         tram_coord_utm, "IN_TRAM")
                         tot_no_subway_count, no_subway_count = _check_location(location_history_json,
-                                                                             subway_coord_32634, "IN_SUBWAY")
-                        tot_no_plane_count = _airport_check_location(location_history_json, plane_coord_32634)
+                                                                             subway_coord_utm, "IN_SUBWAY")
+                        tot_no_plane_count = _airport_check_location(location_history_json, plane_coord_utm)
 
                         # Calculate total distance and count number of missing distance
                         tot_dis, tot_no_dis_count = _activity_distance(location_history_json)
@@ -195,6 +200,8 @@ def process(file_data):
                             "Number of times wrong distance": no_dis_count,
                             "Total distance with haversine distance": round(tot_hav_dis / 1000, 3)
                         })
+                        if TIME_BUCKETS:
+                            segments.append(_time_segments(location_history_json))
                         break
 
         # Put results in DataFrame
@@ -229,6 +236,16 @@ def process(file_data):
             os.remove("output/results_distance.csv")
         data_frame.to_csv('output/results_distance.csv', index=False, encoding='utf-8')
 
+        # Put time bucketed results in DataFrame
+        if TIME_BUCKETS and segments:
+            all_segments = pd.concat(segments, ignore_index=True)
+            if os.path.exists("output/results_daily.csv"):
+                os.remove("output/results_daily.csv")
+            _daily_activity(all_segments).to_csv('output/results_daily.csv', index=False, encoding='utf-8')
+            if os.path.exists("output/results_hourly.csv"):
+                os.remove("output/results_hourly.csv")
+            _hourly_activity(all_segments).to_csv('output/results_hourly.csv', index=False, encoding='utf-8')
+
         return {
             "summary": TEXT,
             "data_frames": [
@@ -1,3 +1,4 @@
+import os
 import warnings
 import pandas as pd
 import geopandas as gpd
@@ -8,26 +9,38 @@ from shapely.ops import transform
 
 warnings.filterwarnings('ignore')
 
+# Projection of the hand-exported station files, used when the station folder has no CRS_FILE
+DEFAULT_CRS = "EPSG:32634"
+# File written by station_layers.py next to the station files with the local metric projection of all layers
+CRS_FILE = "crs.txt"
+
 
 def _create_coordinates(coord_csv):
-    """Transforms the public transport stations and stops to EPSG 4326 and EPSG 32634
+    """Transforms the public transport stations and stops to EPSG 4326 and the local metric projection
     Args:
-        coord_csv: csv file with public transport x and y coordinates
+        coord_csv: csv file with public transport x and y coordinates, the local metric projection is read
+                   from CRS_FILE in the same folder
 
     Returns:
         gdf_4326: dataframe of public transport stations with coordinates in EPSG 4326
-        gdf_32634: dataframe of public transport stations with coordinates in EPSG 32634
+        gdf_utm: dataframe of public transport stations with coordinates in the local metric projection
     """
     df = pd.read_csv(coord_csv, delimiter=",")
+    crs = DEFAULT_CRS
+    crs_file = os.path.join(os.path.dirname(coord_csv), CRS_FILE)
+    if os.path.exists(crs_file):
+        with open(crs_file, encoding='utf-8') as file:
+            crs = file.read().strip()
     gdf_4326 = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df['xcoord'], df['ycoord']), crs='EPSG:4326')
-    gdf_32634 = gdf_4326.to_crs("EPSG:32634")
-    return gdf_4326, gdf_32634
+    gdf_utm = gdf_4326.to_crs(crs)
+    return gdf_4326, gdf_utm
 
 
-def _transform_coordinates(location_history_unit):
+def _transform_coordinates(location_history_unit, crs=DEFAULT_CRS):
     """Transforms coordinates of the start or end location
     Args:
         location_history_unit: One segment of the Google Semantic Location History data
+        crs: the local metric projection of the stations
 
     Returns:
         start_trans: transformed start coordinates
@@ -42,17 +55,17 @@ def _transform_coordinates(location_history_unit):
     project = partial(
         pyproj.transform,
         pyproj.Proj('epsg:4326'),
-        pyproj.Proj('epsg:32634'))
+        pyproj.Proj(crs))
     start_trans = transform(project, start_trans)
     end_trans = transform(project, end_trans)
     return start_trans, end_trans
 
 
-def _check_location(location_history, station_32634, activity):
+def _check_location(location_history, station_utm, activity):
     """Checks if start or end location is an airport and counts when not
     Args:
         location_history (dict): Google Semantic Location History data
-        station_32634: dataframe with EPSG 32634 coordinates of stations
+        station_utm: dataframe with local metric coordinates of stations
         activity: the activity type of interest
 
     Returns:
@@ -64,10 +77,10 @@ def _check_location(location_history, station_32634, activity):
     for location_history_unit in location_history["timelineObjects"]:
         if "activitySegment" in location_history_unit.keys():
             if location_history_unit["activitySegment"]["activityType"] == activity:
-                start_trans, end_trans = _transform_coordinates(location_history_unit)
+                start_trans, end_trans = _transform_coordinates(location_history_unit, station_utm.crs)
                 start_count = 0
                 end_count = 0
-                for station in station_32634.iterrows():
+                for station in station_utm.iterrows():
                     station_buffer = station[1][7].buffer(500, join_style=1)
                     if station_buffer.contains(start_trans) and start_count < 1:
                         start_count += 1
@@ -80,13 +93,13 @@ def _check_location(location_history, station_32634, activity):
     return tot_no_station_count, no_station_count
 
 
-def _train_check_location(location_history, train_32634, tram_32634, subway_32634):
+def _train_check_location(location_history, train_utm, tram_utm, subway_utm):
     """Checks if start or end location is an train station and counts when not
     Args:
         location_history (dict): Google Semantic Location History data
-        train_32634: dataframe with EPSG 32634 coordinates of train stations
-        tram_32634: dataframe with EPSG 32634 coordinates of tram stops
-        subway_32634: dataframe with EPSG 32634 coordinates of subway stops
+        train_utm: dataframe with local metric coordinates of train stations
+        tram_utm: dataframe with local metric coordinates of tram stops
+        subway_utm: dataframe with local metric coordinates of subway stops
 
     Returns:
         tot_no_train_count: total number of times a start of end location was not a train station
@@ -107,25 +120,25 @@ def _train_check_location(location_history, train_32634, tram_32634, subway_3263
     for location_history_unit in location_history["timelineObjects"]:
         if "activitySegment" in location_history_unit.keys():
             if location_history_unit["activitySegment"]["activityType"] == "IN_TRAIN":
-                start_trans, end_trans = _transform_coordinates(location_history_unit)
+                start_trans, end_trans = _transform_coordinates(location_history_unit, train_utm.crs)
                 start_count = 0
                 end_count = 0
                 tram_count = 0
                 subway_count = 0
-                for station in train_32634.iterrows():
+                for station in train_utm.iterrows():
                     station_buffer = station[1][7].buffer(500, join_style=1)
                     if station_buffer.contains(start_trans) and start_count < 1:
                         start_count += 1
                     elif station_buffer.contains(end_trans) and end_count < 1:
                         end_count += 1
                 if start_count == 0:
-                    tram_count, subway_count, no_station_count = _station_different_location(start_trans, tram_32634, subway_32634)
+                    tram_count, subway_count, no_station_count = _station_different_location(start_trans, tram_utm, subway_utm)
                     tot_tram_station += tram_count
                     tot_subway_station += subway_count
                     tot_no_train_count += 1
                     tot_not_station_count += no_station_count
                 elif end_count == 0:
-                    tram_count, subway_count, no_station_count = _station_different_location(end_trans, tram_32634, subway_32634)
+                    tram_count, subway_count, no_station_count = _station_different_location(end_trans, tram_utm, subway_utm)
                     tot_tram_station += tram_count
                     tot_subway_station += subway_count
                     tot_no_train_count += 1
@@ -139,12 +152,12 @@ def _train_check_location(location_history, train_32634, tram_32634, subway_3263
     return tot_no_train_count, tot_tram_station, tot_subway_station, tram_travel, subway_travel, tot_not_train, tot_not_station_count
 
 
-def _station_different_location(coords, tram_32634, subway_32634):
+def _station_different_location(coords, tram_utm, subway_utm):
     """Checks if start or end location is an tram or subway stop and counts when it is
     Args:
         coords: Coordinates start or end location
-        tram_32634: dataframe with EPSG coordinates of tram stops
-        subway_32634: dataframe with EPSG coordinates of subway stops
+        tram_utm: dataframe with local metric coordinates of tram stops
+        subway_utm: dataframe with local metric coordinates of subway stops
 
     Returns:
         tram_count: number of times start or end location was a tram stop
@@ -154,11 +167,11 @@ def _station_different_location(coords, tram_32634, subway_32634):
     tram_count = 0
     subway_count = 0
     no_station_count = 0
-    for tram in tram_32634.iterrows():
+    for tram in tram_utm.iterrows():
         tram_buffer = tram[1][7].buffer(500, join_style=1)
         if tram_buffer.contains(coords):
             tram_count += 1
-    for subway in subway_32634.iterrows():
+    for subway in subway_utm.iterrows():
         subway_buffer = subway[1][7].buffer(500, join_style=1)
         if subway_buffer.contains(coords):
             subway_count += 1
@@ -167,7 +180,7 @@ def _station_different_location(coords, tram_32634, subway_32634):
     return tram_count, subway_count, no_station_count
 
 
-def _airport_check_location(location_history, station_32634):
+def _airport_check_location(location_history, station_utm):
     """Checks if start or end location is an airport and counts when it is
     Args:
         location_history (dict): Google Semantic Location History data
@@ -179,10 +192,10 @@ def _airport_check_location(location_history, station_32634):
     for location_history_unit in location_history["timelineObjects"]:
         if "activitySegment" in location_history_unit.keys():
             if location_history_unit["activitySegment"]["activityType"] == "FLYING":
-                start_trans, end_trans = _transform_coordinates(location_history_unit)
+                start_trans, end_trans = _transform_coordinates(location_history_unit, station_utm.crs)
                 start_count = 0
                 end_count = 0
-                for station in station_32634.iterrows():
+                for station in station_utm.iterrows():
                     station_buffer = station[1][7].buffer(500, join_style=1)
                     if station_buffer.contains(start_trans) and start_count < 1:
                         start_count += 1
@@ -0,0 +1,224 @@
+"""Script to build the public transport station and stop layers from an OpenStreetMap extract"""
+import argparse
+import os
+import re
+import pandas as pd
+import geopandas as gpd
+
+from station_activity import CRS_FILE
+
+# The layers that are written and the tag that is stored for every layer
+LAYERS = {
+    "Train stations": "railway",
+    "Bus stops": "highway",
+    "Tram stops": "railway",
+    "Subway stops": "railway",
+    "Airports": "aeroway"
+}
+# Distance in meters within which nodes with the same name are merged, so the station node and the
+# stop positions of one station are only counted once
+DUPLICATE_DISTANCE = 100
+# One "key"=>"value" pair of the other_tags field written by the GDAL OSM driver
+OTHER_TAG = re.compile(r'"((?:[^"\\]|\\.)*)"=>"((?:[^"\\]|\\.)*)"')
+
+
+def _station_layer(tags):
+    """Gets the layer a node belongs to based on its OpenStreetMap tags
+    Args:
+        tags (dict): OpenStreetMap tags of the node
+
+    Returns:
+        layer: name of the layer or None when the node is not a station or stop
+    """
+    railway = tags.get("railway")
+    if railway == "tram_stop":
+        return "Tram stops"
+    if railway in ["station", "halt", "stop"] and (tags.get("station") == "subway" or tags.get("subway") == "yes"):
+        return "Subway stops"
+    if railway in ["station", "halt"]:
+        return "Train stations"
+    if tags.get("highway") == "bus_stop":
+        return "Bus stops"
+    # Large airports are mapped as areas, their gates, terminals and other aeroway nodes mark the airport
+    if tags.get("aeroway"):
+        return "Airports"
+    return None
+
+
+class _StationCollector:
+    """Collects the station and stop nodes per layer"""
+
+    def __init__(self):
+        self.rows = {layer: [] for layer in LAYERS}
+        self.seen = set()
+
+    def add(self, osm_id, tags, lon, lat):
+        """Adds a node to its layer when it is a station or stop with an id that was not seen before
+        Args:
+            osm_id (int): OpenStreetMap node id
+            tags (dict): OpenStreetMap tags of the node
+            lon (float): longitude of the node
+            lat (float): latitude of the node
+        """
+        layer = _station_layer(tags)
+        if layer is None:
+            return
+        # Nodes with the same id are only added once, nearby nodes are removed by _remove_duplicates
+        if (layer, osm_id) in self.seen:
+            return
+        self.seen.add((layer, osm_id))
+        self.rows[layer].append({
+            "full_id": f"n{osm_id}",
+            "osm_id": str(osm_id),
+            "osm_type": "node",
+            LAYERS[layer]: tags.get(LAYERS[layer]),
+            "name": tags.get("name"),
+            "xcoord": lon,
+            "ycoord": lat
+        })
+
+
+def _read_pbf(pbf_file, collector):
+    """Streams the nodes of an OpenStreetMap PBF extract into the collector
+    Args:
+        pbf_file: path of the .osm.pbf extract
+        collector: _StationCollector the nodes are added to
+    """
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError("Reading PBF extracts requires pyosmium, install it with 'pip install osmium'")
+
+    class NodeHandler(osmium.SimpleHandler):
+        def node(self, node):
+            if len(node.tags) > 0 and node.location.valid():
+                collector.add(node.id, {tag.k: tag.v for tag in node.tags}, node.location.lon, node.location.lat)
+
+    NodeHandler().apply_file(pbf_file, locations=False)
+
+
+def _read_geojson(geojson_file, collector):
+    """Streams the point features of a GeoJSON or GeoJSONSeq extract into the collector
+    Args:
+        geojson_file: path of the GeoJSON extract
+        collector: _StationCollector the nodes are added to
+    """
+    try:
+        import fiona
+    except ImportError:
+        raise ImportError("Reading GeoJSON extracts requires fiona, install it with 'pip install fiona'")
+
+    # The file is opened once and read feature by feature. GDAL reads newline-delimited GeoJSONSeq files
+    # line by line, but may hold a regular GeoJSON document in memory
+    with fiona.open(geojson_file) as features:
+        for feature in features:
+            geometry = feature["geometry"]
+            if geometry is None or geometry["type"] != "Point":
+                continue
+            properties = dict(feature["properties"])
+            osm_id = _node_id(properties)
+            if osm_id is not None:
+                tags = {key: value for key, value in properties.items() if isinstance(value, str)}
+                tags.update(_other_tags(tags.pop("other_tags", "")))
+                lon, lat = geometry["coordinates"][:2]
+                collector.add(osm_id, tags, lon, lat)
+
+
+def _other_tags(other_tags):
+    """Parses the other_tags field of extracts converted with ogr2ogr, which holds the tags that have no field
+    of their own such as railway and aeroway
+    Args:
+        other_tags (str): tags in the format "railway"=>"station","subway"=>"yes"
+
+    Returns:
+        tags (dict): the parsed tags
+    """
+    return {re.sub(r'\\(.)', r'\1', key): re.sub(r'\\(.)', r'\1', value)
+            for key, value in OTHER_TAG.findall(other_tags)}
+
+
+def _node_id(properties):
+    """Gets the OpenStreetMap node id from the properties of a GeoJSON feature
+    Args:
+        properties (dict): properties of the feature, for example {"@id": "node/123"} from Overpass,
+                           {"osm_id": "123"} from ogr2ogr or {"id": "n123"}
+
+    Returns:
+        osm_id (int): node id or None when the feature is not a node
+    """
+    for key in ["@id", "osm_id", "id", "full_id"]:
+        if pd.notna(properties.get(key)):
+            osm_id = str(properties[key])
+            break
+    else:
+        return None
+    osm_id = osm_id.replace("node/", "").lstrip("n")
+    return int(osm_id) if osm_id.isdigit() else None
+
+
+def _remove_duplicates(df, crs):
+    """Keeps one node of the nodes with the same name within DUPLICATE_DISTANCE meters of each other
+    Args:
+        df: dataframe with the nodes of one layer
+        crs: the local metric projection
+
+    Returns:
+        df: dataframe without the duplicate nodes
+    """
+    if df.empty:
+        return df
+    points = gpd.GeoSeries(gpd.points_from_xy(df['xcoord'], df['ycoord']), crs='EPSG:4326').to_crs(crs)
+    # Kept nodes are stored per name and grid cell, so only the 9 surrounding cells need to be checked
+    kept = {}
+    keep = []
+    for name, x, y in zip(df["name"].fillna(""), points.x, points.y):
+        cell_x, cell_y = int(x // DUPLICATE_DISTANCE), int(y // DUPLICATE_DISTANCE)
+        duplicate = any((x - other_x) ** 2 + (y - other_y) ** 2 <= DUPLICATE_DISTANCE ** 2
+                        for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                        for other_x, other_y in kept.get((name, cell_x + dx, cell_y + dy), []))
+        if not duplicate:
+            kept.setdefault((name, cell_x, cell_y), []).append((x, y))
+        keep.append(not duplicate)
+    return df[keep].reset_index(drop=True)
+
+
+def build_station_layers(extract_file, output_folder="input/stations"):
+    """Builds the station and stop layers from an OpenStreetMap PBF, GeoJSON or GeoJSONSeq extract
+    Args:
+        extract_file: path of the .osm.pbf, .geojson or .geojsonl extract
+        output_folder: folder the layers are written to
+
+    Returns:
+        crs: the local metric projection that is stored in CRS_FILE next to the layers
+    """
+    collector = _StationCollector()
+    if extract_file.endswith(".pbf"):
+        _read_pbf(extract_file, collector)
+    else:
+        _read_geojson(extract_file, collector)
+
+    # Pick the UTM zone at the centre of all stations and stops so every layer uses the same projection
+    all_rows = pd.DataFrame([row for rows in collector.rows.values() for row in rows])
+    if all_rows.empty:
+        raise ValueError(f"No public transport stations or stops found in {extract_file}")
+    crs = gpd.GeoDataFrame(geometry=gpd.points_from_xy(all_rows['xcoord'], all_rows['ycoord']),
+                           crs='EPSG:4326').estimate_utm_crs().to_string()
+
+    os.makedirs(output_folder, exist_ok=True)
+    for layer, tag in LAYERS.items():
+        df = pd.DataFrame(collector.rows[layer],
+                          columns=["full_id", "osm_id", "osm_type", tag, "name", "xcoord", "ycoord"])
+        df = _remove_duplicates(df, crs)
+        df.to_csv(os.path.join(output_folder, f"{layer}.csv"), index=False, encoding='utf-8')
+    # The projection is stored once for the folder, so layers without stations or stops use it as well
+    with open(os.path.join(output_folder, CRS_FILE), "w", encoding='utf-8') as file:
+        file.write(crs)
+    return crs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the station and stop layers from an OpenStreetMap extract")
+    parser.add_argument("extract", help="OpenStreetMap .osm.pbf, .geojson or .geojsonl extract")
+    parser.add_argument("--output", default="input/stations", help="folder the layers are written to")
+    args = parser.parse_args()
+    print("Projection:", build_station_layers(args.extract, args.output))
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from haversine import haversine_vector
+
+# The different activity types in the Google Semantic Location History data that are of interest
+TRANSPORT = ["IN_TRAIN", "IN_BUS", "IN_TRAM", "IN_SUBWAY", "FLYING"]
+# Local timezone used for the day and hour bins
+TIMEZONE = "Europe/Amsterdam"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _time_segments(location_history):
+    """Collects the public transport activity segments of one month in a DataFrame
+    Args:
+        location_history (dict): Google Semantic Location History data
+
+    Returns:
+        segments: DataFrame with activity type, UTC start and end time and distance in km per segment
+    """
+    rows = []
+    for location_history_unit in location_history["timelineObjects"]:
+        if "activitySegment" in location_history_unit.keys():
+            segment = location_history_unit["activitySegment"]
+            if segment["activityType"] in TRANSPORT:
+                rows.append((segment["activityType"],
+                             segment["duration"]["startTimestamp"],
+                             segment["duration"]["endTimestamp"],
+                             segment["startLocation"]["latitudeE7"] / 10000000,
+                             segment["startLocation"]["longitudeE7"] / 10000000,
+                             segment["endLocation"]["latitudeE7"] / 10000000,
+                             segment["endLocation"]["longitudeE7"] / 10000000,
+                             segment.get("distance", np.nan)))
+    df = pd.DataFrame(rows, columns=["activity", "start", "end", "start_lat", "start_lon",
+                                     "end_lat", "end_lon", "distance"])
+    df["start"] = _test_time_format(df["start"])
+    df["end"] = _test_time_format(df["end"])
+    df["distance"] = _segment_distance(df)
+    return df[["activity", "start", "end", "distance"]]
+
+
+def _test_time_format(timestamps):
+    """Adds milliseconds to the timestamps when necessary and parses them as UTC
+    Args:
+        timestamps: Series with the activity segment start or end timestamps
+
+    Returns:
+        timestamps: Series with timezone aware UTC timestamps
+    """
+    timestamps = timestamps.astype(str).str.replace(r"(:\d{2})Z$", r"\1.000Z", regex=True)
+    return pd.to_datetime(timestamps, format="%Y-%m-%dT%H:%M:%S.%fZ", utc=True)
+
+
+def _segment_distance(segments):
+    """Gets the distance of every segment in km, using the haversine distance when the distance is missing
+    or differs more than 5 kilometers from the haversine distance
+    Args:
+        segments: DataFrame with the start and end coordinates and logged distance of the segments
+
+    Returns:
+        distance: Series with the distance of every segment in km
+    """
+    if segments.empty:
+        return pd.Series(dtype=float, index=segments.index)
+    haver = haversine_vector(segments[["start_lat", "start_lon"]].to_numpy(),
+                             segments[["end_lat", "end_lon"]].to_numpy())
+    distance = segments["distance"].astype(float) / 1000
+    wrong = distance.isna() | ((distance - haver).abs() > 5)
+    return distance.where(~wrong, haver)
+
+
+def _split_segments(segments, freq):
+    """Splits the segments at local midnight or at every hour so every piece falls in one time bin
+    Args:
+        segments: DataFrame created by _time_segments
+        freq: "D" to split at local midnight, "h" to split at every hour
+
+    Returns:
+        pieces: DataFrame with activity type, local bin start, trips, duration in hours and distance in km
+    """
+    start_local = segments["start"].dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    end_local = segments["end"].dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    if freq == "D":
+        # Day boundaries are computed on the local wall clock so days of 23 and 25 hours are handled
+        first = start_local.dt.floor("D")
+        last = (end_local - pd.Timedelta(1, "ns")).dt.floor("D")
+    else:
+        # Hour boundaries are computed in UTC, shifted by the part of the UTC offset that is not a whole hour
+        # (for example 30 minutes in Asia/Kolkata), so they fall on the local hour without ambiguous hours
+        utc_offset = start_local - segments["start"].dt.tz_localize(None)
+        shift = utc_offset % pd.Timedelta(1, "h")
+        first = (segments["start"] + shift).dt.floor("h") - shift
+        last = (segments["end"] - pd.Timedelta(1, "ns") + shift).dt.floor("h") - shift
+    step = pd.Timedelta(1, freq)
+    count = ((last - first) // step).clip(lower=0).astype(int) + 1
+
+    index = np.repeat(segments.index.to_numpy(), count.to_numpy())
+    piece = np.arange(len(index)) - np.repeat(count.cumsum().to_numpy() - count.to_numpy(), count.to_numpy())
+    pieces = segments.loc[index].reset_index(drop=True)
+    offset = pd.to_timedelta(piece, unit=freq)
+    bin_start = first.loc[index].reset_index(drop=True) + offset
+    if freq == "D":
+        bin_end = _localize(bin_start + step)
+        bin_start = _localize(bin_start)
+    else:
+        bin_end = bin_start + step
+
+    piece_start = pieces["start"].where(pieces["start"] > bin_start, bin_start)
+    piece_end = pieces["end"].where(pieces["end"] < bin_end, bin_end)
+    seconds = (piece_end - piece_start).dt.total_seconds().clip(lower=0)
+    total = (pieces["end"] - pieces["start"]).dt.total_seconds()
+    # The distance is divided over the pieces in proportion to their duration
+    share = (seconds / total.where(total > 0)).fillna(1.0)
+
+    return pd.DataFrame({
+        "activity": pieces["activity"],
+        "bin": bin_start.dt.tz_convert(TIMEZONE),
+        "trips": (piece == 0).astype(int),
+        "duration": seconds / 3600,
+        "distance": pieces["distance"].fillna(0) * share
+    })
+
+
+def _localize(wall_time):
+    """Transforms local wall clock times to UTC timestamps
+    Args:
+        wall_time: Series with timezone naive local times
+
+    Returns:
+        Series with timezone aware UTC timestamps
+    """
+    return wall_time.dt.tz_localize(TIMEZONE, ambiguous=False, nonexistent="shift_forward").dt.tz_convert("UTC")
+
+
+def _daily_activity(segments):
+    """Gets the number of trips, duration and distance per local day and activity type
+    Args:
+        segments: DataFrame created by _time_segments
+
+    Returns:
+        daily: DataFrame with trips, duration in hours and distance in km per day and activity type
+    """
+    pieces = _split_segments(segments, "D")
+    pieces["Date"] = pieces["bin"].dt.strftime("%Y-%m-%d")
+    return _aggregate(pieces, ["Date"])
+
+
+def _hourly_activity(segments):
+    """Gets the number of trips, duration and distance per local hour of the week and activity type
+    Args:
+        segments: DataFrame created by _time_segments
+
+    Returns:
+        hourly: DataFrame with trips, duration in hours and distance in km per hour of the week and activity type
+    """
+    pieces = _split_segments(segments, "h")
+    pieces["Weekday"] = pd.Categorical(pieces["bin"].dt.dayofweek.map(dict(enumerate(WEEKDAYS))),
+                                       categories=WEEKDAYS, ordered=True)
+    pieces["Hour"] = pieces["bin"].dt.hour
+    return _aggregate(pieces, ["Weekday", "Hour"])
+
+
+def _aggregate(pieces, keys):
+    """Sums the trips, duration and distance of the pieces per time bin and activity type
+    Args:
+        pieces: DataFrame created by _split_segments with the time bin columns added
+        keys: names of the time bin columns
+
+    Returns:
+        DataFrame with one row per time bin and activity type
+    """
+    grouped = pieces.groupby(keys + ["activity"], observed=True, sort=True)[["trips", "duration", "distance"]].sum()
+    grouped = grouped.reset_index().rename(columns={
+        "activity": "Activity type",
+        "trips": "Trips",
+        "duration": "Duration [hours]",
+        "distance": "Distance [km]"
+    })
+    return grouped.round({"Duration [hours]": 3, "Distance [km]": 3})